@@ -2,14 +2,59 @@
 Crafting API Router
 Handles crafting calculation and strategy endpoints
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
+import hashlib
 import logging
+import orjson
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Static reference data, serialized once at import rather than per request
+CRAFTING_METHODS = {
+    "exalted": {
+        "name": "Exalted Orb",
+        "description": "Add a random affix to a rare item",
+        "cost_estimate": 180
+    },
+    "harvest": {
+        "name": "Harvest Craft",
+        "description": "Add specific type of mod (life, fire, etc.)",
+        "cost_estimate": 50
+    },
+    "essence": {
+        "name": "Essence Craft",
+        "description": "Reforge item with guaranteed mod",
+        "cost_estimate": 5
+    },
+    "veiled_chaos": {
+        "name": "Veiled Chaos Orb",
+        "description": "Reforge with veiled mod",
+        "cost_estimate": 30
+    },
+    "recombinator": {
+        "name": "Recombinator",
+        "description": "Combine two items (1/3 success rate)",
+        "cost_estimate": 100
+    },
+    "annulment": {
+        "name": "Orb of Annulment",
+        "description": "Remove random mod",
+        "cost_estimate": 20
+    },
+    "beastcraft": {
+        "name": "Beastcraft",
+        "description": "Various crafting options via beasts",
+        "cost_estimate": 10
+    }
+}
+
+_METHODS_BODY = orjson.dumps({"success": True, "methods": CRAFTING_METHODS})
+_METHODS_ETAG = f'"{hashlib.md5(_METHODS_BODY).hexdigest()}"'
+_METHODS_HEADERS = {"Cache-Control": "public, max-age=86400", "ETag": _METHODS_ETAG}
+
 
 class CraftingRequest(BaseModel):
     """Request model for crafting calculations"""
@@ -52,7 +97,7 @@ async def calculate_crafting_strategy(request: CraftingRequest) -> Dict[str, Any
 
 
 @router.get("/methods")
-async def get_crafting_methods() -> Dict[str, Any]:
+async def get_crafting_methods(request: Request) -> Response:
     """
     Get all available crafting methods with descriptions
 
@@ -64,45 +109,11 @@ async def get_crafting_methods() -> Dict[str, Any]:
             }
         }
     """
-    methods = {
-        "exalted": {
-            "name": "Exalted Orb",
-            "description": "Add a random affix to a rare item",
-            "cost_estimate": 180
-        },
-        "harvest": {
-            "name": "Harvest Craft",
-            "description": "Add specific type of mod (life, fire, etc.)",
-            "cost_estimate": 50
-        },
-        "essence": {
-            "name": "Essence Craft",
-            "description": "Reforge item with guaranteed mod",
-            "cost_estimate": 5
-        },
-        "veiled_chaos": {
-            "name": "Veiled Chaos Orb",
-            "description": "Reforge with veiled mod",
-            "cost_estimate": 30
-        },
-        "recombinator": {
-            "name": "Recombinator",
-            "description": "Combine two items (1/3 success rate)",
-            "cost_estimate": 100
-        },
-        "annulment": {
-            "name": "Orb of Annulment",
-            "description": "Remove random mod",
-            "cost_estimate": 20
-        },
-        "beastcraft": {
-            "name": "Beastcraft",
-            "description": "Various crafting options via beasts",
-            "cost_estimate": 10
-        }
-    }
+    if request.headers.get("if-none-match") == _METHODS_ETAG:
+        return Response(status_code=304, headers=_METHODS_HEADERS)
 
-    return {
-        "success": True,
-        "methods": methods
-    }
+    return Response(
+        content=_METHODS_BODY,
+        media_type="application/json",
+        headers=_METHODS_HEADERS
+    )
@@ -0,0 +1,36 @@
+"""
+Shared API Dependencies
+Services are created once in the app lifespan (main.py) and stored on app.state;
+these helpers hand them to route handlers via Depends()
+"""
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator
+
+from database.mod_db import ModDatabase
+from scrapers.poe_ninja import PoeNinjaScraper
+from scrapers.poedb_scraper import PoeDBScraper
+
+
+def get_mod_db(request: Request) -> ModDatabase:
+    """Mod database shared by all requests"""
+    return request.app.state.mod_db
+
+
+async def get_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    One database session per request, shared by every query the route makes
+    Closing it rolls back anything left uncommitted (e.g. after an exception)
+    """
+    async with request.app.state.mod_db.SessionLocal() as session:
+        yield session
+
+
+def get_poe_ninja(request: Request) -> PoeNinjaScraper:
+    """poe.ninja scraper shared by all requests"""
+    return request.app.state.poe_ninja
+
+
+def get_poedb(request: Request) -> PoeDBScraper:
+    """poedb.tw scraper shared by all requests"""
+    return request.app.state.poedb
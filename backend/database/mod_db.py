@@ -8,16 +8,151 @@ Features:
 - Search mods by name
 - Cache frequently accessed data
 """
-from sqlalchemy import create_engine, and_, or_
-from sqlalchemy.orm import sessionmaker, Session
-from typing import List, Dict, Optional, Any
+from sqlalchemy import select, insert, delete, func, text, event, type_coerce, literal_column, JSON
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from contextlib import asynccontextmanager
+from cachetools import TTLCache
+from cachetools.keys import hashkey
+from asyncache import cached
+from typing import AsyncIterator, List, Dict, Optional, Any
 import logging
+import orjson
+import re
 from pathlib import Path
+from datetime import datetime
 
-from .models import Base, Mod, ItemBase, Build, MarketItem
+from .models import Base, Mod, ModItemClass, ItemBase, Build, MarketItem, Meta
 
 logger = logging.getLogger(__name__)
 
+# Applied to every new SQLite connection: WAL lets readers run alongside the
+# scrape writer, mmap + a 64 MB page cache keep the read-heavy mod queries in memory
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA foreign_keys=ON",
+)
+
+
+# Bump when the table layout changes; checked against PRAGMA user_version in connect()
+# v2: mods.stat_ranges back to plain JSON (v1 databases may hold zstd blobs there)
+# v3: dropped the redundant ix_mods_name and ix_mod_name_nocase indexes
+# v4: per-item-class ilvl/tier on mod_item_classes
+SCHEMA_VERSION = 4
+
+# External-content FTS5 index over mod names; rebuilt by store_mods
+MODS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE mods_fts USING fts5("
+    "name, content='mods', content_rowid='id', tokenize='unicode61')"
+)
+MODS_FTS_REBUILD = "INSERT INTO mods_fts(mods_fts) VALUES('rebuild')"
+# Letters and digits only: "_" is a separator to the unicode61 tokenizer, so a
+# term containing it has to take the literal substring path
+_FTS_TOKEN_RE = re.compile(r'[^\W_]+')
+# Search terms made of only these go through FTS; anything else is a literal substring
+_FTS_PLAIN_RE = re.compile(r'(?:[^\W_]|\s)+')
+
+
+def _escape_like(term: str) -> str:
+    """Escape LIKE wildcards so user input matches literally (escape char is backslash)"""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+# Meta row updated by store_mods, reported as last_update by get_stats
+MODS_LAST_UPDATE_KEY = "mods_last_update"
+
+# Columns selected by get_mods. Rows come back as plain mappings keyed like
+# Mod.to_dict(), skipping ORM identity-map and instrumentation
+_MOD_COLS = (
+    Mod.id,
+    Mod.name,
+    Mod.type,
+    Mod.tier,
+    Mod.ilvl,
+    Mod.tags,
+    type_coerce(
+        select(func.json_group_array(ModItemClass.item_class))
+        .where(ModItemClass.mod_id == Mod.id)
+        .correlate(Mod)  # Not the outer mod_item_classes join of a per-class query
+        .scalar_subquery(),
+        JSON
+    ).label('item_classes'),
+    Mod.stat_ranges,
+    Mod.source,
+)
+
+# get_mods columns for a single item class: tier and ilvl come from that class's
+# mod_item_classes row. Grouped by mod, in case it is listed under both the class
+# and "universal"; SQLite takes the bare tier from the row holding min(ilvl)
+_CLASS_MOD_COLS = tuple(
+    {
+        'tier': ModItemClass.tier.label('tier'),
+        'ilvl': func.min(ModItemClass.ilvl).label('ilvl'),
+    }.get(col.key, col)
+    for col in _MOD_COLS
+)
+
+# One JSON object per build, serialized by SQLite itself (keys match Build.to_dict())
+_BUILD_JSON = func.json_object(
+    'id', Build.id,
+    'league', Build.league,
+    'name', Build.name,
+    'class', Build.character_class,
+    'level', Build.level,
+    'mainSkill', Build.main_skill,
+    'dps', Build.dps,
+    'life', Build.life,
+    'energyShield', Build.energy_shield,
+    'items', func.json(func.coalesce(func.nullif(Build.items, 'null'), '[]')),
+    'url', Build.url,
+    'timestamp', func.replace(Build.snapshot_timestamp, ' ', 'T')
+)
+
+# Hot (item_class, mod_type, ilvl, search) combos from the UI, and the
+# /api/status counts. Both are cleared whenever store_mods replaces the data
+_mods_cache = TTLCache(maxsize=512, ttl=300)
+_stats_cache = TTLCache(maxsize=1, ttl=60)
+
+
+@asynccontextmanager
+async def _write_transaction(session: AsyncSession) -> AsyncIterator[None]:
+    """
+    Run the block's writes in one transaction and commit it
+
+    If the session already autobegan a transaction (it ran a query earlier in
+    the request), the writes join it and it is committed at the end, instead of
+    session.begin() raising "A transaction is already begun"
+    """
+    if not session.in_transaction():
+        async with session.begin():
+            yield
+        return
+
+    try:
+        yield
+    except BaseException:
+        await session.rollback()
+        raise
+    await session.commit()
+
+
+def _cache_key(self, session, *args, **kwargs):
+    """Cache key for ModDatabase methods: skip `self` and the session, but keep one db apart from another"""
+    return hashkey(self.db_path, *args, **kwargs)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Connection event hook that applies SQLITE_PRAGMAS"""
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
 
 class ModDatabase:
     def __init__(self, db_path: str = "../data/poe_mods.db"):
@@ -28,84 +163,213 @@ class ModDatabase:
             db_path: Path to SQLite database file
         """
         # Ensure data directory exists
-        db_file = Path(db_path)
-        db_file.parent.mkdir(parents=True, exist_ok=True)
-
-        # Create database connection
-        self.db_path = f"sqlite:///{db_path}"
-        self.engine = create_engine(self.db_path, echo=False)
-        self.SessionLocal = sessionmaker(bind=self.engine)
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        # Create async database connection (aiosqlite driver)
+        # In-memory databases only exist on one connection, so share it; file
+        # databases get a real pool for concurrent readers
+        self.db_path = f"sqlite+aiosqlite:///{db_path}"
+        if db_path == ":memory:":
+            pool_args = {
+                "poolclass": StaticPool,
+                "connect_args": {"check_same_thread": False}
+            }
+        else:
+            pool_args = {
+                "poolclass": AsyncAdaptedQueuePool,
+                "pool_size": 10,
+                "max_overflow": 20
+            }
+        self.engine = create_async_engine(self.db_path, echo=False, **pool_args)
+        event.listen(self.engine.sync_engine, "connect", _set_sqlite_pragmas)
+        self.SessionLocal = async_sessionmaker(
+            self.engine,
+            expire_on_commit=False,
+            class_=AsyncSession
+        )
+
+        # Pre-encoded /api/mods/all response and the mods_last_update meta value
+        # it was built from; rebuilt whenever that value changes
+        self._all_mods_body: Optional[bytes] = None
+        self._all_mods_stamp: Optional[str] = None
+
+    async def connect(self):
+        """
+        Create or upgrade the schema if it is older than SCHEMA_VERSION
+        Called once from the FastAPI lifespan on startup
 
-        # Create tables if they don't exist
-        Base.metadata.create_all(self.engine)
-        logger.info(f"Mod database initialized at: {db_path}")
+        The version lives in SQLite's PRAGMA user_version, so an up-to-date
+        database costs a single pragma read instead of create_all()'s per-table
+        reflection. Mod tables only hold scraped data, so an outdated layout is
+        dropped and recreated (re-run /api/scrape/mods) rather than migrated
+        """
+        async with self.engine.begin() as conn:
+            version = await conn.scalar(text("PRAGMA user_version"))
+            if version < SCHEMA_VERSION:
+                logger.info(f"Upgrading database schema v{version} -> v{SCHEMA_VERSION}")
+                await conn.execute(text("DROP TABLE IF EXISTS mods_fts"))
+                await conn.run_sync(
+                    Base.metadata.drop_all,
+                    tables=[ModItemClass.__table__, Mod.__table__]
+                )
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(text(MODS_FTS_DDL))
+                await conn.execute(text(f"PRAGMA user_version = {SCHEMA_VERSION}"))
+        logger.info(f"Mod database initialized at: {self.db_path}")
+
+    async def close(self):
+        """Refresh query planner stats and dispose of pooled connections"""
+        await self._optimize()
+        await self.engine.dispose()
+
+    async def _optimize(self):
+        """Run PRAGMA optimize so the planner has fresh stats for the mod indexes"""
+        try:
+            async with self.engine.connect() as conn:
+                await conn.execute(text("PRAGMA optimize"))
+        except Exception as e:
+            logger.warning(f"PRAGMA optimize failed: {e}")
 
-    def get_session(self) -> Session:
-        """Get database session"""
-        return self.SessionLocal()
+    @asynccontextmanager
+    async def get_session(self) -> AsyncIterator[AsyncSession]:
+        """
+        Get database session
+        Routes get one per request via api.dependencies.get_session; this is
+        for work outside a request (background jobs, scripts)
+        """
+        async with self.SessionLocal() as session:
+            yield session
 
-    async def store_mods(self, mods_data: Dict[str, List[Dict]]) -> int:
+    async def store_mods(self, session: AsyncSession, mods_data: Dict[str, List[Dict]]) -> int:
         """
         Store scraped mods in database
 
+        Upserts on (name, type) in a single transaction, so the table stays
+        queryable during a re-scrape, then purges mods the scrape no longer saw
+
         Args:
+            session: Database session; a transaction it already has open is
+                joined and committed along with the store
             mods_data: Dictionary with 'prefix' and 'suffix' keys containing mod lists
 
         Returns:
             Total number of mods stored
         """
-        session = self.get_session()
-        total_stored = 0
-
-        try:
-            # Clear existing mods (replace with fresh data)
-            session.query(Mod).delete()
-            session.commit()
-
-            # Store prefix mods
-            for mod_data in mods_data.get('prefix', []):
-                mod = Mod(
-                    name=mod_data['name'],
-                    type='prefix',
-                    tier=mod_data.get('tier'),
-                    ilvl=mod_data.get('ilvl', 1),
-                    tags=mod_data.get('tags', []),
-                    item_classes=mod_data.get('item_classes', []),
-                    stat_ranges=mod_data.get('stat_ranges', []),
-                    source=mod_data.get('source', 'poedb')
+        scraped_at = datetime.utcnow()
+
+        # poedb lists the same mod once per item-class table, and the ilvl/tier
+        # can differ between classes. Each class keeps its own lowest-ilvl
+        # (ilvl, tier) for mod_item_classes; the mods row is collapsed to one per
+        # (name, type) and takes the lowest ilvl overall (with that listing's
+        # tier and ranges) for unfiltered item_class="all" queries
+        rows: Dict[tuple, Dict[str, Any]] = {}
+        class_levels: Dict[tuple, Dict[str, tuple]] = {}
+        for mod_type in ('prefix', 'suffix'):
+            for m in mods_data.get(mod_type, []):
+                key = (m['name'], mod_type)
+                ilvl = m.get('ilvl', 1)
+                levels = class_levels.setdefault(key, {})
+                for ic in m.get('item_classes', []):
+                    if ic not in levels or ilvl < levels[ic][0]:
+                        levels[ic] = (ilvl, m.get('tier'))
+
+                if key in rows and rows[key]['ilvl'] <= ilvl:
+                    continue
+                rows[key] = {
+                    'name': m['name'],
+                    'type': mod_type,
+                    'tier': m.get('tier'),
+                    'ilvl': ilvl,
+                    'tags': m.get('tags', []),
+                    'stat_ranges': m.get('stat_ranges', []),
+                    'source': m.get('source', 'poedb'),
+                    'updated_at': scraped_at
+                }
+
+        async with _write_transaction(session):
+            if rows:
+                stmt = sqlite_insert(Mod)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['name', 'type'],
+                    set_={
+                        c.name: stmt.excluded[c.name]
+                        for c in Mod.__table__.c
+                        if c.name not in ('id', 'name', 'type', 'created_at')
+                    }
                 )
-                session.add(mod)
-                total_stored += 1
-
-            # Store suffix mods
-            for mod_data in mods_data.get('suffix', []):
-                mod = Mod(
-                    name=mod_data['name'],
-                    type='suffix',
-                    tier=mod_data.get('tier'),
-                    ilvl=mod_data.get('ilvl', 1),
-                    tags=mod_data.get('tags', []),
-                    item_classes=mod_data.get('item_classes', []),
-                    stat_ranges=mod_data.get('stat_ranges', []),
-                    source=mod_data.get('source', 'poedb')
+                result = await session.execute(
+                    stmt.returning(Mod.id, Mod.name, Mod.type),
+                    list(rows.values())
                 )
-                session.add(mod)
-                total_stored += 1
-
-            session.commit()
-            logger.info(f"Stored {total_stored} mods in database")
-
-        except Exception as e:
-            session.rollback()
-            logger.error(f"Error storing mods: {e}")
-            raise
-        finally:
-            session.close()
-
-        return total_stored
+                mod_ids = {(name, mod_type): mod_id for mod_id, name, mod_type in result}
+            else:
+                mod_ids = {}
+
+            # Purge mods removed from poedb and rebuild the item class links
+            await session.execute(delete(ModItemClass))
+            await session.execute(delete(Mod).where(Mod.updated_at < scraped_at))
+
+            class_rows = [
+                {'mod_id': mod_ids[key], 'item_class': ic, 'ilvl': ilvl, 'tier': tier}
+                for key, levels in class_levels.items()
+                for ic, (ilvl, tier) in levels.items()
+            ]
+            if class_rows:
+                await session.execute(insert(ModItemClass), class_rows)
+
+            await session.execute(text(MODS_FTS_REBUILD))
+
+            stmt = sqlite_insert(Meta).values(
+                key=MODS_LAST_UPDATE_KEY, value=scraped_at.isoformat(), updated_at=scraped_at
+            )
+            await session.execute(stmt.on_conflict_do_update(
+                index_elements=[Meta.key],
+                set_={'value': stmt.excluded.value, 'updated_at': stmt.excluded.updated_at}
+            ))
+
+        logger.info(f"Stored {len(rows)} mods in database")
+
+        _mods_cache.clear()
+        _stats_cache.clear()
+        self._all_mods_body = None
+        await self.get_all_mods_body(session)
+        # End the read transaction the rebuild autobegan, leaving the session idle
+        await session.commit()
+        await self._optimize()
+        return len(rows)
+
+    async def get_all_mods_body(self, session: AsyncSession) -> bytes:
+        """
+        Get the full, unfiltered mod list as an encoded /api/mods response body
 
+        This is the largest and most common UI request, so it is serialized
+        once per scrape and served as bytes, skipping the mod query and JSON
+        encoding. The scrape may have run in another worker process, so each
+        call checks the mods_last_update meta row (a primary key lookup) and
+        rebuilds when it no longer matches
+        """
+        stamp = await session.scalar(
+            select(Meta.value).where(Meta.key == MODS_LAST_UPDATE_KEY)
+        )
+        if self._all_mods_body is None or stamp != self._all_mods_stamp:
+            if stamp != self._all_mods_stamp:
+                # Mods changed under this process; its query caches are stale too
+                _mods_cache.clear()
+                _stats_cache.clear()
+            mods = await self.get_mods(session, 'all')
+            self._all_mods_body = orjson.dumps({
+                "success": True,
+                "count": len(mods),
+                "mods": mods
+            })
+            self._all_mods_stamp = stamp
+        return self._all_mods_body
+
+    @cached(_mods_cache, key=_cache_key)
     async def get_mods(
         self,
+        session: AsyncSession,
         item_class: str,
         mod_type: Optional[str] = None,
         min_ilvl: int = 1,
@@ -116,138 +380,147 @@ class ModDatabase:
         Get mods filtered by criteria
 
         Args:
+            session: Database session
             item_class: Item class (e.g., "Ring", "Body Armour", "universal")
             mod_type: "prefix" or "suffix" (optional, returns both if not specified)
             min_ilvl: Minimum item level
-            max_ilvl: Maximum item level
-            search: Search term for mod name
+            max_ilvl: Maximum item level. For a specific item class both bounds
+                apply to that class's ilvl, and the returned tier/ilvl are that
+                class's; for "all" they apply to the mod's lowest ilvl
+            search: Search term for mod name. A term of plain words matches each
+                word against the start of a word in the name via the FTS index
+                ("max life" finds "+# to maximum Life"). A term with any other
+                characters ("15% to", "+#") is a literal case-insensitive substring
+                match; "%" and "_" have no wildcard meaning
 
         Returns:
             List of mod dictionaries
         """
-        session = self.get_session()
-
-        try:
-            # Build query
-            query = session.query(Mod)
-
-            # Filter by mod type
-            if mod_type:
-                query = query.filter(Mod.type == mod_type)
-
-            # Filter by ilvl range
-            query = query.filter(
-                and_(
-                    Mod.ilvl >= min_ilvl,
-                    Mod.ilvl <= max_ilvl
+        # Build query, filtering by item class and ilvl range
+        if item_class and item_class.lower() != 'all':
+            # Index seek on mod_item_classes for the specified class or "universal",
+            # with the ilvl range checked against that class's own listing
+            stmt = (
+                select(*_CLASS_MOD_COLS)
+                .join(ModItemClass, ModItemClass.mod_id == Mod.id)
+                .where(
+                    ModItemClass.item_class.in_([item_class, "universal"]),
+                    ModItemClass.ilvl.between(min_ilvl, max_ilvl)
                 )
+                .group_by(Mod.id)
             )
-
-            # Filter by item class
-            # Check if item_classes JSON array contains the specified class or "universal"
-            if item_class and item_class.lower() != 'all':
-                query = query.filter(
-                    or_(
-                        Mod.item_classes.contains([item_class]),
-                        Mod.item_classes.contains(["universal"])
+        else:
+            stmt = select(*_MOD_COLS).where(Mod.ilvl.between(min_ilvl, max_ilvl))
+
+        # Filter by mod type
+        if mod_type:
+            stmt = stmt.where(Mod.type == mod_type)
+
+        # Search by name
+        if search:
+            tokens = _FTS_TOKEN_RE.findall(search)
+            if not tokens or not _FTS_PLAIN_RE.fullmatch(search):
+                # Punctuation (%, +, #, ...) is part of PoE mod names, so match the
+                # term literally; SQLite LIKE is already case-insensitive
+                pattern = f"%{_escape_like(search)}%"
+                stmt = stmt.where(Mod.name.like(pattern, escape='\\'))
+            else:
+                # Quoted prefix query per word, so FTS5 syntax in user input is inert
+                fts_query = ' '.join(f'"{token}"*' for token in tokens)
+                stmt = stmt.where(
+                    Mod.id.in_(
+                        select(literal_column("rowid"))
+                        .select_from(text("mods_fts"))
+                        .where(text("mods_fts MATCH :q").bindparams(q=fts_query))
                     )
                 )
 
-            # Search by name
-            if search:
-                query = query.filter(Mod.name.ilike(f"%{search}%"))
-
-            # Execute query
-            mods = query.all()
-
-            # Convert to dictionaries
-            return [mod.to_dict() for mod in mods]
+        # Execute query
+        result = await session.execute(stmt)
+        return [dict(row) for row in result.mappings()]
 
-        except Exception as e:
-            logger.error(f"Error getting mods: {e}")
-            raise
-        finally:
-            session.close()
-
-    async def get_stats(self) -> Dict[str, Any]:
+    @cached(_stats_cache, key=_cache_key)
+    async def get_stats(self, session: AsyncSession) -> Dict[str, Any]:
         """
         Get database statistics
 
         Returns:
             Dictionary with mod counts and other stats
         """
-        session = self.get_session()
+        # One GROUP BY pass for all counts, with the last scrape time
+        # from the meta table riding along as a scalar subquery
+        last_update = (
+            select(Meta.value)
+            .where(Meta.key == MODS_LAST_UPDATE_KEY)
+            .scalar_subquery()
+        )
+        result = await session.execute(
+            select(Mod.type, func.count(), last_update).group_by(Mod.type)
+        )
+        rows = result.all()
+        counts = {mod_type: count for mod_type, count, _ in rows}
+
+        return {
+            'total_mods': sum(counts.values()),
+            'prefix_count': counts.get('prefix', 0),
+            'suffix_count': counts.get('suffix', 0),
+            'last_update': (rows[0][2] if rows else None) or 'N/A'
+        }
+
+    async def store_builds(self, session: AsyncSession, builds: List[Dict], league: str) -> int:
+        """
+        Store scraped builds in database, replacing the league's previous snapshot
 
-        try:
-            total_mods = session.query(Mod).count()
-            prefix_count = session.query(Mod).filter(Mod.type == 'prefix').count()
-            suffix_count = session.query(Mod).filter(Mod.type == 'suffix').count()
-
-            return {
-                'total_mods': total_mods,
-                'prefix_count': prefix_count,
-                'suffix_count': suffix_count,
-                'last_update': 'N/A'  # TODO: Add timestamp tracking
-            }
+        Args:
+            session: Database session; a transaction it already has open is
+                joined and committed along with the store
+            builds: Normalized builds from PoeNinjaScraper
+            league: League the builds belong to
 
-        except Exception as e:
-            logger.error(f"Error getting stats: {e}")
-            return {
-                'total_mods': 0,
-                'prefix_count': 0,
-                'suffix_count': 0,
-                'error': str(e)
+        Returns:
+            Number of builds stored
+        """
+        rows = [
+            {
+                'league': league,
+                'name': b.get('name'),
+                'character_class': b.get('class'),
+                'level': b.get('level'),
+                'main_skill': b.get('mainSkill'),
+                'dps': b.get('dps'),
+                'life': b.get('life'),
+                'energy_shield': b.get('energyShield'),
+                'items': b.get('items', []),
+                'url': b.get('url')
             }
-        finally:
-            session.close()
+            for b in builds
+        ]
 
-    async def store_builds(self, builds: List[Dict], league: str) -> int:
-        """Store scraped builds in database"""
-        session = self.get_session()
-        total_stored = 0
+        # Replace old builds for this league in one transaction
+        async with _write_transaction(session):
+            await session.execute(delete(Build).where(Build.league == league))
+            if rows:
+                await session.execute(insert(Build), rows)
 
-        try:
-            # Delete old builds for this league
-            session.query(Build).filter(Build.league == league).delete()
-
-            # Store new builds
-            for build_data in builds:
-                build = Build(
-                    league=league,
-                    name=build_data.get('name'),
-                    character_class=build_data.get('class'),
-                    level=build_data.get('level'),
-                    main_skill=build_data.get('mainSkill'),
-                    dps=build_data.get('dps'),
-                    life=build_data.get('life'),
-                    energy_shield=build_data.get('energyShield'),
-                    items=build_data.get('items', []),
-                    url=build_data.get('url')
-                )
-                session.add(build)
-                total_stored += 1
-
-            session.commit()
-            logger.info(f"Stored {total_stored} builds for league {league}")
-
-        except Exception as e:
-            session.rollback()
-            logger.error(f"Error storing builds: {e}")
-            raise
-        finally:
-            session.close()
-
-        return total_stored
+        logger.info(f"Stored {len(rows)} builds for league {league}")
+        return len(rows)
 
-    async def get_builds(self, league: str, limit: int = 100) -> List[Dict]:
+    async def get_builds(self, session: AsyncSession, league: str, limit: int = 100) -> List[Dict]:
         """Get stored builds for a league"""
-        session = self.get_session()
+        return orjson.loads(await self.get_builds_json(session, league, limit))
 
-        try:
-            builds = session.query(Build).filter(Build.league == league).limit(limit).all()
-            return [build.to_dict() for build in builds]
-        except Exception as e:
-            logger.error(f"Error getting builds: {e}")
-            return []
-        finally:
-            session.close()
+    async def get_builds_json(self, session: AsyncSession, league: str, limit: int = 100) -> str:
+        """
+        Get stored builds for a league as a ready-to-send JSON array
+
+        The whole array is built by SQLite (json_object + json_group_array),
+        so routes can return it as the response body without re-encoding
+        """
+        builds = (
+            select(_BUILD_JSON.label('build'))
+            .where(Build.league == league)
+            .limit(limit)
+            .subquery()
+        )
+        stmt = select(func.json_group_array(func.json(builds.c.build)))
+        return await session.scalar(stmt)
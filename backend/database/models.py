@@ -3,28 +3,76 @@ SQLAlchemy Database Models for PoE Market Helper
 
 Models:
 - Mod: Mod affixes (prefix/suffix)
+- ModItemClass: Item classes a mod can roll on (indexed lookup table)
 - ItemBase: Base item types
 - Build: Scraped build data
 - MarketItem: Market price data
+- Meta: Key/value bookkeeping (e.g. last mod scrape time)
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, JSON, Text
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, JSON, Text, LargeBinary, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
+import orjson
+import zstandard
 
 Base = declarative_base()
 
 
+class ZstdJSON(TypeDecorator):
+    """
+    JSON value stored as a zstd-compressed blob
+    For bulky payloads that are only ever read back whole (never filtered on in SQL)
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    _compressor = zstandard.ZstdCompressor(level=3)
+    _decompressor = zstandard.ZstdDecompressor()
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return self._compressor.compress(orjson.dumps(value))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):  # Row written before the column was compressed
+            return orjson.loads(value)
+        return orjson.loads(self._decompressor.decompress(value))
+
+
 class Mod(Base):
     """Mod affix database model"""
     __tablename__ = 'mods'
+    __table_args__ = (
+        # Covers the item_class="all" get_mods predicate (type = ? AND ilvl BETWEEN ? AND ?)
+        Index('ix_mod_type_ilvl', 'type', 'ilvl'),
+        # Upsert target for store_mods; its leading name column also serves
+        # name lookups, so name carries no index of its own
+        UniqueConstraint('name', 'type', name='uq_mod_name_type'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    name = Column(String(255), nullable=False, index=True)
-    type = Column(String(10), nullable=False, index=True)  # 'prefix' or 'suffix'
+    name = Column(String(255), nullable=False)
+    type = Column(String(10), nullable=False)  # 'prefix' or 'suffix'
+    # Tier/ilvl of the mod's lowest-ilvl listing across all item classes;
+    # the per-class values are on ModItemClass
     tier = Column(String(50))
-    ilvl = Column(Integer, nullable=False, index=True)
+    ilvl = Column(Integer, nullable=False)
     tags = Column(JSON)  # List of tags
-    item_classes = Column(JSON)  # List of applicable item classes
+    # Loading strategy is picked per query (selectinload for lists, joinedload for
+    # single rows). lazy="raise" turns a forgotten loader option into an immediate
+    # error, since an implicit lazy load can't run under the async engine anyway;
+    # passive_deletes leaves child rows to ON DELETE CASCADE instead of loading them
+    item_classes = relationship(
+        "ModItemClass",
+        cascade="all, delete-orphan",
+        lazy="raise",
+        passive_deletes=True
+    )
+    # Plain JSON: a few bytes per row, which zstd would only grow, on the hottest read path
     stat_ranges = Column(JSON)  # List of {min, max} stat ranges
     source = Column(String(50), default='poedb')
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -39,12 +87,30 @@ class Mod(Base):
             'tier': self.tier,
             'ilvl': self.ilvl,
             'tags': self.tags or [],
-            'item_classes': self.item_classes or [],
+            'item_classes': [c.item_class for c in self.item_classes],
             'stat_ranges': self.stat_ranges or [],
             'source': self.source
         }
 
 
+class ModItemClass(Base):
+    """
+    Item class a mod applies to (one row per mod/class pair)
+    poedb lists the same mod per item class, possibly at a different ilvl/tier,
+    so those live here rather than on Mod
+    """
+    __tablename__ = 'mod_item_classes'
+    __table_args__ = (
+        # Covers the per-class get_mods predicate (item_class IN (...) AND ilvl BETWEEN ...)
+        Index('ix_mic_class_ilvl', 'item_class', 'ilvl', 'mod_id'),
+    )
+
+    mod_id = Column(Integer, ForeignKey('mods.id', ondelete='CASCADE'), primary_key=True)
+    item_class = Column(String(64), primary_key=True)  # 'Ring', 'Body Armour', 'universal', ...
+    ilvl = Column(Integer, nullable=False)  # Lowest ilvl the mod rolls at on this class
+    tier = Column(String(50))
+
+
 class ItemBase(Base):
     """Item base types"""
     __tablename__ = 'item_bases'
@@ -84,7 +150,7 @@ class Build(Base):
     dps = Column(Integer)
     life = Column(Integer)
     energy_shield = Column(Integer)
-    items = Column(JSON)  # List of equipped items
+    items = Column(JSON)  # List of equipped items (kept as JSON text: get_builds reads it inside json_object())
     url = Column(String(500))
     snapshot_timestamp = Column(DateTime)  # When build was captured
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -119,7 +185,7 @@ class MarketItem(Base):
     divine_value = Column(Float)
     exalted_value = Column(Float)
     listing_count = Column(Integer)
-    spark_line = Column(JSON)  # Price history
+    spark_line = Column(ZstdJSON)  # Price history
     low_confidence = Column(Boolean, default=False)
     snapshot_timestamp = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -139,3 +205,12 @@ class MarketItem(Base):
             'lowConfidence': self.low_confidence,
             'timestamp': self.snapshot_timestamp.isoformat() if self.snapshot_timestamp else None
         }
+
+
+class Meta(Base):
+    """Key/value bookkeeping rows maintained by the database handler"""
+    __tablename__ = 'meta'
+
+    key = Column(String(100), primary_key=True)
+    value = Column(String(255))
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
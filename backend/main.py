@@ -10,18 +10,27 @@ This server provides REST API endpoints for:
 
 Run with: uvicorn main:app --reload --port 8000
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict, Any
+from contextlib import asynccontextmanager
 import uvicorn
 import logging
+import os
 
 # Import our modules
 from scrapers.poe_ninja import PoeNinjaScraper
 from scrapers.poedb_scraper import PoeDBScraper
+from scrapers.browser import close_browser
 from database.mod_db import ModDatabase
 from api import builds, crafting, market
+from api.dependencies import get_mod_db, get_session, get_poe_ninja, get_poedb
+from utils.jobs import JobRegistry
+from utils.http_cache import close_cache
 
 # Configure logging
 logging.basicConfig(
@@ -30,10 +39,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Initialize services once per worker on startup and release them on shutdown
+    Routes get them from app.state via the api.dependencies helpers
+    """
+    logger.info("Initializing services...")
+    app.state.mod_db = ModDatabase()
+    await app.state.mod_db.connect()
+    app.state.poe_ninja = PoeNinjaScraper()
+    app.state.poedb = PoeDBScraper()
+    app.state.jobs = JobRegistry()
+    yield
+    await app.state.jobs.shutdown()
+    await app.state.poe_ninja.close()
+    await close_browser()
+    close_cache()
+    await app.state.mod_db.close()
+
+
 app = FastAPI(
     title="PoE Market Helper API",
     description="Backend for Path of Exile market analysis and crafting",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse  # orjson encodes large mod/build payloads far faster than stdlib json
 )
 
 # CORS - allow Electron frontend to connect
@@ -45,11 +76,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-logger.info("Initializing services...")
-poe_ninja = PoeNinjaScraper()
-poedb = PoeDBScraper()
-mod_db = ModDatabase()
+# Full mod lists run to several MB of JSON; compress anything over 1 KB
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # Include routers
 app.include_router(builds.router, prefix="/api/builds", tags=["builds"])
@@ -74,10 +102,13 @@ async def root():
 
 
 @app.get("/api/status")
-async def get_status():
+async def get_status(
+    mod_db: ModDatabase = Depends(get_mod_db),
+    session: AsyncSession = Depends(get_session)
+):
     """Get backend status and capabilities"""
     try:
-        mod_stats = await mod_db.get_stats()
+        mod_stats = await mod_db.get_stats(session)
         return {
             "status": "operational",
             "playwright": "available",
@@ -96,12 +127,40 @@ async def get_status():
         }
 
 
+# Background job endpoints
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, request: Request):
+    """
+    Get state of a background scrape job
+
+    Returns:
+        {
+            "job_id": "3f2a...",
+            "type": "scrape_mods",
+            "state": "running" | "completed" | "failed" | "cancelled",
+            "started_at": "2025-01-15T10:30:00",
+            "finished_at": null,
+            "result": {...} once completed,
+            "error": "..." if failed
+        }
+    """
+    job = request.app.state.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+
 # Build scraping endpoints
-@app.post("/api/scrape/builds")
-async def scrape_builds(league: str):
+@app.post("/api/scrape/builds", status_code=202)
+async def scrape_builds(
+    league: str,
+    request: Request,
+    poe_ninja: PoeNinjaScraper = Depends(get_poe_ninja)
+):
     """
     Scrape builds from poe.ninja using headless browser
     This ACTUALLY WORKS because Playwright can execute JavaScript!
+    Runs in the background; poll GET /api/jobs/{job_id} for the result
 
     Args:
         league: League name (e.g., "Affliction", "Standard")
@@ -109,23 +168,32 @@ async def scrape_builds(league: str):
     Returns:
         {
             "success": true,
+            "job_id": "3f2a...",
+            "state": "running"
+        }
+
+        Completed job result:
+        {
             "builds_count": 250,
             "data": [...builds...],
-            "timestamp": "2025-01-15T10:30:00"
+            "league": "Affliction"
         }
     """
-    try:
+    async def run():
         logger.info(f"Scraping builds for league: {league}")
         builds = await poe_ninja.scrape_builds(league)
         return {
-            "success": True,
             "builds_count": len(builds),
             "data": builds,
             "league": league
         }
-    except Exception as e:
-        logger.error(f"Error scraping builds: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+
+    job = request.app.state.jobs.start("scrape_builds", run)
+    return {
+        "success": True,
+        "job_id": job["job_id"],
+        "state": job["state"]
+    }
 
 
 # Mod database endpoints
@@ -135,7 +203,9 @@ async def get_mods(
     mod_type: Optional[str] = None,  # "prefix" or "suffix"
     min_ilvl: int = 1,
     max_ilvl: int = 100,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    mod_db: ModDatabase = Depends(get_mod_db),
+    session: AsyncSession = Depends(get_session)
 ):
     """
     Get comprehensive mod data from database
@@ -166,7 +236,14 @@ async def get_mods(
         }
     """
     try:
+        # Unfiltered full list: serve the body pre-encoded after the last scrape
+        if (item_class.lower() == "all" and mod_type is None and search is None
+                and min_ilvl == 1 and max_ilvl == 100):
+            body = await mod_db.get_all_mods_body(session)
+            return Response(content=body, media_type="application/json")
+
         mods = await mod_db.get_mods(
+            session,
             item_class=item_class,
             mod_type=mod_type,
             min_ilvl=min_ilvl,
@@ -183,39 +260,55 @@ async def get_mods(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/scrape/mods")
-async def scrape_mods(force_refresh: bool = False):
+@app.post("/api/scrape/mods", status_code=202)
+async def scrape_mods(
+    request: Request,
+    force_refresh: bool = False,
+    poedb: PoeDBScraper = Depends(get_poedb),
+    mod_db: ModDatabase = Depends(get_mod_db)
+):
     """
     Scrape mod database from poedb.tw
     This will take a few minutes but provides comprehensive mod data
+    Runs in the background; poll GET /api/jobs/{job_id} for the result
 
     Args:
-        force_refresh: Force refresh even if cache exists
+        force_refresh: Re-render poedb pages even if the HTTP cache is fresh
 
     Returns:
         {
             "success": true,
+            "job_id": "3f2a...",
+            "state": "running"
+        }
+
+        Completed job result:
+        {
             "prefix_count": 500,
             "suffix_count": 600,
             "total": 1100
         }
     """
-    try:
+    async def run():
         logger.info("Starting mod database scrape from poedb.tw...")
-        mods = await poedb.scrape_all_mods()
+        mods = await poedb.scrape_all_mods(force_refresh=force_refresh)
 
-        # Store in database
-        await mod_db.store_mods(mods)
+        # Store in database (the job outlives the request, so it opens its own session)
+        async with mod_db.get_session() as session:
+            await mod_db.store_mods(session, mods)
 
         return {
-            "success": True,
             "prefix_count": len(mods.get("prefix", [])),
             "suffix_count": len(mods.get("suffix", [])),
             "total": len(mods.get("prefix", [])) + len(mods.get("suffix", []))
         }
-    except Exception as e:
-        logger.error(f"Error scraping mods: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+
+    job = request.app.state.jobs.start("scrape_mods", run)
+    return {
+        "success": True,
+        "job_id": job["job_id"],
+        "state": job["state"]
+    }
 
 
 # Market data endpoints
@@ -223,19 +316,22 @@ async def scrape_mods(force_refresh: bool = False):
 async def get_market_data(
     league: str,
     category: str,  # "currency", "fragments", "divination-cards", etc.
+    force_refresh: bool = False,
+    poe_ninja: PoeNinjaScraper = Depends(get_poe_ninja)
 ):
     """
-    Get market data from poe.ninja
+    Get market data from poe.ninja (cached for 5 minutes)
 
     Args:
         league: League name
         category: Data category
+        force_refresh: Bypass the HTTP cache
 
     Returns:
         Market data for the specified category
     """
     try:
-        data = await poe_ninja.scrape_market_data(league, category)
+        data = await poe_ninja.scrape_market_data(league, category, force_refresh=force_refresh)
         return {
             "success": True,
             "league": league,
@@ -250,11 +346,19 @@ async def get_market_data(
 if __name__ == "__main__":
     # Run server on port 8000
     # Electron app will connect to http://localhost:8000
+    # loop/http "auto" use uvloop + httptools when installed and fall back to
+    # asyncio + h11 otherwise (uvicorn[standard] doesn't install uvloop on Windows).
+    # Scrape jobs live in each worker's memory, so extra workers
+    # (POE_BACKEND_WORKERS, capped at 4) only help read traffic;
+    # use `uvicorn main:app --reload` for development
+    workers = min(int(os.environ.get("POE_BACKEND_WORKERS", "1")), 4, os.cpu_count() or 1)
     logger.info("Starting PoE Market Helper Backend on port 8000...")
     uvicorn.run(
-        app,
+        "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        loop="auto",
+        http="auto",
+        workers=workers,
         log_level="info"
     )
@@ -0,0 +1,161 @@
+"""
+Shared Headless Browser
+One Playwright driver + Chromium process per worker, launched on first use
+
+Launching Chromium costs 0.5-2s; a BrowserContext costs milliseconds.
+Scrapers borrow a context from `context_pool` instead of launching their own
+browser. The app lifespan calls close_browser() on shutdown.
+"""
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright, Route
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+VIEWPORT = {'width': 1920, 'height': 1080}
+
+# Lean headless Chromium for scraping: no GPU, extensions, sync or background
+# traffic, fewer renderer processes (no site isolation) and a capped V8 heap.
+CHROMIUM_ARGS = [
+    "--no-sandbox",
+    "--disable-gpu",
+    "--disable-dev-shm-usage",  # /dev/shm is tiny in Docker
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--disable-translate",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--no-pings",
+    # Chromium only honours the last --disable-features, so keep them in one flag
+    "--disable-features=site-per-process,TranslateUI,BlinkGenPropertyTrees",
+    "--js-flags=--max-old-space-size=256",
+]
+
+# Nothing we scrape needs these; aborting them saves bandwidth and render time
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media", "stylesheet"})
+BLOCKED_DOMAINS = ("google-analytics", "googletagmanager", "doubleclick")
+
+_playwright: Optional[Playwright] = None
+_browser: Optional[Browser] = None
+_lock = asyncio.Lock()
+
+
+async def get_browser() -> Browser:
+    """Get the shared browser, launching it (or relaunching after a crash) if needed"""
+    global _playwright, _browser
+
+    async with _lock:
+        if _browser is None or not _browser.is_connected():
+            if _playwright is None:
+                _playwright = await async_playwright().start()
+            logger.info("Launching headless browser...")
+            _browser = await _playwright.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+        return _browser
+
+
+async def _block_unneeded(route: Route):
+    """Route handler aborting images/fonts/media/CSS and analytics requests"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(d in request.url for d in BLOCKED_DOMAINS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+class ContextPool:
+    """
+    Bounded pool of BrowserContexts on the shared browser
+
+    Caps concurrent scrapes at `size` while letting that many run in parallel.
+    Each context is closed and replaced after `recycle_after` uses, since
+    long-lived contexts slowly leak native memory in Chromium.
+    """
+
+    def __init__(self, size: int = 4, recycle_after: int = 100):
+        self.size = size
+        self.recycle_after = recycle_after
+        self._uses: Dict[BrowserContext, int] = {}
+        # Slots start empty (None); contexts are created on first acquire
+        self._queue: asyncio.Queue = asyncio.Queue()
+        for _ in range(size):
+            self._queue.put_nowait(None)
+
+    async def _new_context(self) -> BrowserContext:
+        browser = await get_browser()
+        context = await browser.new_context(user_agent=USER_AGENT, viewport=VIEWPORT)
+        # Installed once per context, so it covers every page a scraper opens on it
+        await context.route("**/*", _block_unneeded)
+        return context
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[BrowserContext]:
+        """Borrow a context; pages opened on it are closed when it is returned"""
+        context = await self._queue.get()
+
+        try:
+            if context is None or not context.browser.is_connected():
+                self._uses.pop(context, None)
+                context = await self._new_context()
+        except Exception:
+            self._queue.put_nowait(None)
+            raise
+
+        try:
+            yield context
+        finally:
+            await self._release(context)
+
+    async def _release(self, context: BrowserContext):
+        uses = self._uses.pop(context, 0) + 1
+
+        try:
+            if uses >= self.recycle_after:
+                await context.close()
+                self._queue.put_nowait(None)
+                return
+
+            for page in context.pages:
+                await page.close()
+        except Exception as e:
+            logger.warning(f"Discarding browser context: {e}")
+            self._queue.put_nowait(None)
+            return
+
+        self._uses[context] = uses
+        self._queue.put_nowait(context)
+
+    async def close(self):
+        """Close idle contexts (contexts still borrowed close with the browser)"""
+        for _ in range(self._queue.qsize()):
+            context = self._queue.get_nowait()
+            if context is not None:
+                self._uses.pop(context, None)
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.debug(f"Error closing browser context: {e}")
+            self._queue.put_nowait(None)
+
+
+context_pool = ContextPool()
+
+
+async def close_browser():
+    """Close pooled contexts and the shared browser, then stop the Playwright driver"""
+    global _playwright, _browser
+
+    await context_pool.close()
+
+    async with _lock:
+        if _browser is not None:
+            await _browser.close()
+            _browser = None
+        if _playwright is not None:
+            await _playwright.stop()
+            _playwright = None
@@ -3,29 +3,48 @@ PoE.ninja Scraper with Playwright (Headless Browser)
 This ACTUALLY WORKS because it executes JavaScript!
 
 Capabilities:
-- Scrape builds from poe.ninja/builds (React/Next.js rendered)
-- Scrape market data from API endpoints
+- Scrape builds from poe.ninja's build API, or poe.ninja/builds (React/Next.js rendered) as fallback
+- Scrape market data from API endpoints (plain HTTP, browser only as fallback)
 - Extract data from JavaScript-rendered pages
 """
-from playwright.async_api import async_playwright, Browser, Page
-from typing import List, Dict, Optional, Any
+from playwright.async_api import Page
+from typing import AsyncIterator, List, Dict, Optional, Any
 import asyncio
-import json
+import httpx
 import logging
-from datetime import datetime
+import orjson
+import re
+from datetime import datetime, timezone
+
+from .browser import context_pool, close_browser, USER_AGENT
+from utils.http_cache import fetch_cached, CURRENCY_MAX_AGE
 
 logger = logging.getLogger(__name__)
 
+# Numbers as shown on poe.ninja, e.g. "1234", "2.3k", "1.5M"
+# A suffix glued to the number always counts ("12kDPS"); after a space it must
+# stand alone, so it isn't the first letter of a word ("95 Berserker" is 95)
+_NUM_RE = re.compile(r'(-?\d*\.?\d+)(?:([kmb])|\s+([kmb])(?![a-z]))?', re.IGNORECASE)
+_MULT = {"k": 1_000, "m": 1_000_000, "b": 1_000_000_000}
+
+# The browser fallback stops trying further extraction methods once it has this many builds
+TARGET_BUILDS = 50
+
 
 class PoeNinjaScraper:
     def __init__(self):
         self.base_url = "https://poe.ninja"
         self.timeout = 30000  # 30 seconds
 
+        # Keep-alive client for poe.ninja's JSON API (no browser needed)
+        self._client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"},
+            timeout=self.timeout / 1000
+        )
+
     async def scrape_builds(self, league: str) -> List[Dict[str, Any]]:
         """
-        Scrape builds from poe.ninja using headless browser
-        Executes JavaScript and waits for React to render!
+        Scrape builds from poe.ninja (collects iter_builds into a list)
 
         Args:
             league: League name (e.g., "Affliction", "Standard")
@@ -33,23 +52,97 @@ class PoeNinjaScraper:
         Returns:
             List of build dictionaries with character info, items, skills
         """
-        builds = []
+        return [build async for build in self.iter_builds(league)]
+
+    async def iter_builds(self, league: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield builds from poe.ninja as they are parsed
+        Tries the JSON API the builds page itself calls; if that fails, falls back
+        to the headless browser, which executes JavaScript and waits for React to render
+
+        Args:
+            league: League name (e.g., "Affliction", "Standard")
 
-        async with async_playwright() as p:
+        Yields:
+            Build dictionaries with character info, items, skills
+        """
+        # One timestamp for the whole batch
+        ts = datetime.now(timezone.utc).isoformat()
+
+        builds = await self._fetch_build_overview(league, ts)
+        if builds:
+            logger.info(f"Scraped {len(builds)} builds (poe.ninja API)")
+            for build in builds:
+                yield build
+            return
+
+        logger.info("Build overview API gave no builds, falling back to headless browser")
+        count = 0
+        async for build in self._iter_builds_browser(league, ts):
+            count += 1
+            yield build
+        logger.info(f"Scraped {count} builds (headless browser)")
+
+    async def _fetch_build_overview(self, league: str, ts: str) -> List[Dict[str, Any]]:
+        """
+        Fetch builds from poe.ninja's build overview API (no browser)
+        Returns [] if the request fails or the payload isn't in a shape we recognise
+        """
+        try:
+            response = await self._client.get(
+                f"{self.base_url}/api/data/0/getbuildoverview",
+                params={"overview": league.lower(), "type": "exp", "language": "en"}
+            )
+
+            if response.status_code != 200:
+                logger.warning(f"Build overview API returned status {response.status_code}")
+                return []
+
+            return self._parse_nextjs_builds(orjson.loads(response.content), ts)
+
+        except Exception as e:
+            logger.warning(f"Build overview API failed: {e}")
+            return []
+
+    async def _iter_builds_browser(self, league: str, ts: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield builds from the rendered poe.ninja builds page"""
+        # Methods can overlap when an earlier one only partly succeeds; yield each build once
+        seen = set()
+
+        def is_new(build: Dict[str, Any]) -> bool:
+            key = (build["name"], build["class"], build["mainSkill"], build["level"])
+            if key in seen:
+                return False
+            seen.add(key)
+            return True
+
+        # Borrow a context on the shared browser (no per-call Chromium launch)
+        async with context_pool.acquire() as context:
             try:
-                # Launch headless browser
-                logger.info("Launching headless browser...")
-                browser = await p.chromium.launch(headless=True)
-                context = await browser.new_context(
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    viewport={'width': 1920, 'height': 1080}
-                )
                 page = await context.new_page()
 
-                # Navigate to builds page
+                # Capture API responses from the start (used by Method 3); attached
+                # before goto so calls fired during page load aren't missed
+                api_data = []
+                api_seen = asyncio.Event()
+
+                async def handle_response(response):
+                    if "/api/data" in response.url or "/builds" in response.url:
+                        try:
+                            data = orjson.loads(await response.body())
+                            api_data.append(data)
+                            api_seen.set()
+                            logger.info(f"Captured API response from: {response.url}")
+                        except Exception:
+                            # Not JSON (e.g. the /builds HTML document itself)
+                            pass
+
+                page.on("response", handle_response)
+
+                # Navigate to builds page (wait_for_selector below decides when it's rendered)
                 url = f"{self.base_url}/builds/{league.lower().replace(' ', '-')}"
                 logger.info(f"Navigating to: {url}")
-                await page.goto(url, wait_until="networkidle", timeout=self.timeout)
+                await page.goto(url, wait_until="domcontentloaded", timeout=self.timeout)
 
                 # Wait for React to render the builds
                 try:
@@ -79,107 +172,93 @@ class PoeNinjaScraper:
                     page_props = next_data.get("props", {}).get("pageProps", {})
 
                     # Try different possible data locations
-                    if "builds" in page_props:
-                        builds.extend(self._parse_nextjs_builds(page_props["builds"]))
-                    elif "snapshot" in page_props:
-                        builds.extend(self._parse_nextjs_builds(page_props["snapshot"]))
-                    elif "data" in page_props:
-                        builds.extend(self._parse_nextjs_builds(page_props["data"]))
+                    for key in ("builds", "snapshot", "data"):
+                        if key in page_props:
+                            for build in self._parse_nextjs_builds(page_props[key], ts):
+                                if is_new(build):
+                                    yield build
+                            break
+
+                # Enough builds; skip the remaining methods
+                if len(seen) >= TARGET_BUILDS:
+                    return
 
                 # Method 2: Extract from DOM elements
-                if not builds:
-                    logger.info("Trying DOM extraction...")
-                    build_elements = await page.query_selector_all(
-                        ".build-card, .character-row, [class*='Build'], tr"
-                    )
+                logger.info("Trying DOM extraction...")
+                # One evaluate for all elements instead of a CDP round-trip per element
+                raw_builds = await page.evaluate("""
+                    () => Array.from(
+                        document.querySelectorAll(".build-card, .character-row, [class*='Build'], tr")
+                    ).slice(0, 100).map((el) => {  // Limit to 100 builds
+                        // Try to extract common build information
+                        const getText = (selector) => {
+                            const elem = el.querySelector(selector);
+                            return elem ? elem.textContent.trim() : null;
+                        };
+
+                        return {
+                            name: getText('[class*="name"]') || getText('.name'),
+                            class: getText('[class*="class"]') || getText('.class'),
+                            level: getText('[class*="level"]') || getText('.level'),
+                            skill: getText('[class*="skill"]') || getText('.skill'),
+                            dps: getText('[class*="dps"]') || getText('.dps'),
+                            life: getText('[class*="life"]') || getText('.life'),
+                            energy_shield: getText('[class*="es"]') || getText('.es')
+                        };
+                    })
+                """)
 
-                    for element in build_elements[:100]:  # Limit to 100 builds
-                        try:
-                            # Extract build data from DOM
-                            build_data = await element.evaluate("""
-                                (el) => {
-                                    // Try to extract common build information
-                                    const getText = (selector) => {
-                                        const elem = el.querySelector(selector);
-                                        return elem ? elem.textContent.trim() : null;
-                                    };
-
-                                    return {
-                                        name: getText('[class*="name"]') || getText('.name'),
-                                        class: getText('[class*="class"]') || getText('.class'),
-                                        level: getText('[class*="level"]') || getText('.level'),
-                                        skill: getText('[class*="skill"]') || getText('.skill'),
-                                        dps: getText('[class*="dps"]') || getText('.dps'),
-                                        life: getText('[class*="life"]') || getText('.life'),
-                                        energy_shield: getText('[class*="es"]') || getText('.es')
-                                    };
-                                }
-                            """)
-
-                            if build_data and (build_data.get("name") or build_data.get("class")):
-                                builds.append(self._normalize_build(build_data))
-
-                        except Exception as e:
-                            logger.debug(f"Error parsing build element: {e}")
-                            continue
+                for build_data in raw_builds:
+                    if build_data.get("name") or build_data.get("class"):
+                        build = self._normalize_build(build_data, ts)
+                        if is_new(build):
+                            yield build
+
+                if len(seen) >= TARGET_BUILDS:
+                    return
 
                 # Method 3: Listen for API responses
-                if not builds:
-                    logger.info("Trying to capture API responses...")
-                    api_data = []
-
-                    async def handle_response(response):
-                        if "/api/data" in response.url or "/builds" in response.url:
-                            try:
-                                data = await response.json()
-                                api_data.append(data)
-                                logger.info(f"Captured API response from: {response.url}")
-                            except:
-                                pass
-
-                    page.on("response", handle_response)
-
-                    # Trigger any lazy-loaded API calls
-                    await page.wait_for_timeout(3000)
-
-                    # Parse API data
-                    for data in api_data:
-                        if isinstance(data, list):
-                            builds.extend([self._normalize_build(b) for b in data])
-                        elif isinstance(data, dict):
-                            if "builds" in data:
-                                builds.extend([self._normalize_build(b) for b in data["builds"]])
-                            elif "snapshot" in data:
-                                builds.extend([self._normalize_build(b) for b in data["snapshot"]])
-
-                await browser.close()
+                logger.info("Trying to capture API responses...")
+
+                # Give lazy-loaded API calls up to 3s, but stop as soon as one lands
+                try:
+                    await asyncio.wait_for(api_seen.wait(), timeout=3.0)
+                except asyncio.TimeoutError:
+                    pass
+
+                # Parse API data
+                for data in api_data:
+                    if isinstance(data, dict):
+                        data = data.get("builds", data.get("snapshot", []))
+                    if isinstance(data, list):
+                        for b in data:
+                            build = self._normalize_build(b, ts)
+                            if is_new(build):
+                                yield build
 
             except Exception as e:
                 logger.error(f"Error scraping builds: {e}")
                 raise
 
-        logger.info(f"Scraped {len(builds)} builds")
-        return builds
-
-    def _parse_nextjs_builds(self, data: Any) -> List[Dict[str, Any]]:
+    def _parse_nextjs_builds(self, data: Any, ts: str) -> List[Dict[str, Any]]:
         """Parse builds from Next.js page props"""
         builds = []
 
         if isinstance(data, list):
             for item in data:
-                builds.append(self._normalize_build(item))
+                builds.append(self._normalize_build(item, ts))
         elif isinstance(data, dict):
             # Try common data structures
             for key in ["builds", "characters", "data", "items"]:
                 if key in data and isinstance(data[key], list):
                     for item in data[key]:
-                        builds.append(self._normalize_build(item))
+                        builds.append(self._normalize_build(item, ts))
                     break
 
         return builds
 
-    def _normalize_build(self, raw_build: Dict[str, Any]) -> Dict[str, Any]:
-        """Normalize build data to consistent format"""
+    def _normalize_build(self, raw_build: Dict[str, Any], ts: str) -> Dict[str, Any]:
+        """Normalize build data to consistent format (ts: ISO timestamp of the scrape)"""
         return {
             "name": raw_build.get("name") or raw_build.get("character") or "Unknown",
             "class": raw_build.get("class") or raw_build.get("className") or "Unknown",
@@ -190,75 +269,123 @@ class PoeNinjaScraper:
             "energyShield": self._parse_int(raw_build.get("energy_shield") or raw_build.get("energyShield") or raw_build.get("es")),
             "items": raw_build.get("items", []),
             "url": raw_build.get("url") or raw_build.get("poeUrl"),
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": ts
         }
 
     def _parse_int(self, value: Any) -> Optional[int]:
-        """Safely parse integer from various formats"""
+        """Safely parse integer from various formats ("1,234", "2.3k", "1.5M")"""
         if value is None:
             return None
         try:
             if isinstance(value, str):
-                # Remove commas and 'k' suffix
-                value = value.replace(',', '').replace('k', '000').replace('K', '000')
+                value = value.replace(',', '')
+                try:
+                    # Plain numbers, including forms like "1e5", go straight through float()
+                    return int(float(value))
+                except ValueError:
+                    pass
+
+                match = _NUM_RE.search(value)
+                if not match:
+                    return None
+                number, glued, spaced = match.groups()
+                suffix = glued or spaced
+                if not suffix:
+                    return int(float(number))
+                # round, since e.g. 4.35 * 1000 is 4349.999... in floating point
+                return round(float(number) * _MULT[suffix.lower()])
             return int(float(value))
-        except:
+        except (TypeError, ValueError, OverflowError):  # OverflowError: "inf"
             return None
 
-    async def scrape_market_data(self, league: str, category: str) -> List[Dict]:
+    async def scrape_market_data(self, league: str, category: str, force_refresh: bool = False) -> List[Dict]:
         """
         Scrape market data (currency, items, etc.)
-        This works with regular API calls (no JS needed)
+        This works with regular API calls (no JS needed), so it's a plain HTTP
+        GET; the headless browser is only used if Cloudflare blocks us (403)
 
         Args:
             league: League name
             category: Category (currency, fragments, divination-cards, etc.)
+            force_refresh: Fetch even if a cached copy is younger than CURRENCY_MAX_AGE
 
         Returns:
             List of market items with prices
         """
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
+        api_url = f"{self.base_url}/api/data/{category}Overview?league={league}"
 
-            try:
-                # Navigate to API endpoint directly
-                api_url = f"{self.base_url}/api/data/{category}Overview?league={league}"
-                logger.info(f"Fetching market data from: {api_url}")
+        try:
+            return await fetch_cached(
+                api_url,
+                CURRENCY_MAX_AGE,
+                lambda: self._fetch_market_data(api_url, league, category),
+                force_refresh
+            )
+
+        except Exception as e:
+            logger.error(f"Error scraping market data: {e}")
+            raise
+
+    async def scrape_market_data_many(
+        self,
+        league: str,
+        categories: List[str],
+        force_refresh: bool = False
+    ) -> Dict[str, List[Dict]]:
+        """
+        Scrape several market categories concurrently
 
-                response = await page.goto(api_url, timeout=self.timeout)
+        Args:
+            league: League name
+            categories: Categories to fetch (currency, fragments, ...)
+            force_refresh: Bypass the HTTP cache
 
-                if response.status != 200:
-                    raise Exception(f"API returned status {response.status}")
+        Returns:
+            {category: [market items]}
+        """
+        results = await asyncio.gather(*(
+            self.scrape_market_data(league, category, force_refresh)
+            for category in categories
+        ))
+        return dict(zip(categories, results))
 
-                # Extract JSON data
-                content = await page.content()
+    async def _fetch_market_data(self, api_url: str, league: str, category: str) -> List[Dict]:
+        """Fetch market lines from the poe.ninja API (uncached)"""
+        logger.info(f"Fetching market data from: {api_url}")
 
-                # Parse pre tag content (API returns JSON in <pre> tag)
-                data = await page.evaluate("""
-                    () => {
-                        const pre = document.querySelector('pre');
-                        if (pre) {
-                            return JSON.parse(pre.textContent);
-                        }
-                        return null;
-                    }
-                """)
+        response = await self._client.get(
+            f"{self.base_url}/api/data/{category}Overview",
+            params={"league": league}
+        )
 
-                if not data:
-                    # Try parsing entire body as JSON
-                    try:
-                        data = json.loads(content)
-                    except:
-                        data = {}
+        if response.status_code == 403:
+            logger.warning("poe.ninja API returned 403, retrying with headless browser")
+            return await self._scrape_market_data_browser(api_url)
 
-                await browser.close()
-                return data.get("lines", [])
+        if response.status_code != 200:
+            raise Exception(f"API returned status {response.status_code}")
 
-            except Exception as e:
-                logger.error(f"Error scraping market data: {e}")
-                await browser.close()
-                raise
+        data = orjson.loads(response.content)
+        return data.get("lines", [])
+
+    async def _scrape_market_data_browser(self, api_url: str) -> List[Dict]:
+        """Fetch a poe.ninja API URL through the headless browser (Cloudflare fallback)"""
+        async with context_pool.acquire() as context:
+            page = await context.new_page()
+            # Only the response bytes matter, so return as soon as the response starts
+            response = await page.goto(api_url, wait_until="commit", timeout=self.timeout)
+
+            if response.status != 200:
+                raise Exception(f"API returned status {response.status}")
+
+            # Decode the raw response bytes (page.content() would be the HTML wrapper around the JSON)
+            data = orjson.loads(await response.body())
+
+            return data.get("lines", [])
+
+    async def close(self):
+        """Close the shared HTTP client"""
+        await self._client.aclose()
 
 
 # Example usage
@@ -270,12 +397,15 @@ async def main():
     print(f"Found {len(builds)} builds")
     if builds:
         print("\nExample build:")
-        print(json.dumps(builds[0], indent=2))
+        print(orjson.dumps(builds[0], option=orjson.OPT_INDENT_2).decode())
 
     print("\nScraping market data...")
     market = await scraper.scrape_market_data("Standard", "currency")
     print(f"Found {len(market)} currency items")
 
+    await scraper.close()
+    await close_browser()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -9,158 +9,186 @@ Provides:
 - Item class applicability
 - Tags and spawn weights
 """
-from playwright.async_api import async_playwright
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any
+from lxml import etree, html as lxml_html
+from typing import List, Dict, Any, Tuple
 import asyncio
 import re
 import logging
 
+from .browser import context_pool, close_browser
+from utils.http_cache import fetch_cached, MODS_MAX_AGE
+
 logger = logging.getLogger(__name__)
 
+# Rows with at least one <td> in any table whose class list contains "table"
+# (descendant axis, since Chromium's serialized HTML wraps rows in <tbody>)
+_MOD_ROWS_XPATH = etree.XPath(
+    "//table[contains(concat(' ', normalize-space(@class), ' '), ' table ')]//tr[td]"
+)
+_CELLS_XPATH = etree.XPath("./td")
+
+_ILVL_RE = re.compile(r'(\d+)')
+_RANGE_RE = re.compile(r'\((\d+)-(\d+)\)')
+_TAG_SPLIT_RE = re.compile(r'[,_\s]+')
+
+# Map (lowercased) poedb tags to item classes
+_TAG_TO_CLASSES: Dict[str, Tuple[str, ...]] = {
+    'ring': ('Ring',),
+    'jewellery': ('Ring', 'Amulet'),
+    'amulet': ('Amulet',),
+    'belt': ('Belt',),
+    'body': ('Body Armour',),
+    'armour': ('Body Armour', 'Helmet', 'Gloves', 'Boots'),
+    'helmet': ('Helmet',),
+    'helm': ('Helmet',),
+    'gloves': ('Gloves',),
+    'boots': ('Boots',),
+    'shield': ('Shield',),
+    'weapon': ('Sword', 'Axe', 'Mace', 'Bow', 'Wand', 'Dagger', 'Claw', 'Staff', 'Sceptre'),
+    'sword': ('Sword',),
+    'axe': ('Axe',),
+    'mace': ('Mace',),
+    'bow': ('Bow',),
+    'wand': ('Wand',),
+    'dagger': ('Dagger',),
+    'claw': ('Claw',),
+    'staff': ('Staff',),
+    'sceptre': ('Sceptre',),
+    'quiver': ('Quiver',),
+    'jewel': ('Jewel',),
+    'flask': ('Flask',)
+}
+
 
 class PoeDBScraper:
     def __init__(self):
         self.base_url = "https://poedb.tw/us"
         self.timeout = 30000
 
-    async def scrape_all_mods(self) -> Dict[str, List[Dict]]:
+    async def scrape_all_mods(self, force_refresh: bool = False) -> Dict[str, List[Dict]]:
         """
         Scrape ALL mod affixes from poedb
         This gets us a complete, up-to-date mod database
 
+        Args:
+            force_refresh: Re-render the pages even if a cached copy is fresh
+
         Returns:
             {
                 "prefix": [...],
                 "suffix": [...]
             }
         """
-        all_mods = {
-            "prefix": [],
-            "suffix": []
+        try:
+            # Prefix and suffix pages are independent; render them concurrently
+            prefix, suffix = await asyncio.gather(
+                self._scrape_mod_type("prefix", force_refresh),
+                self._scrape_mod_type("suffix", force_refresh)
+            )
+        except Exception as e:
+            logger.error(f"Error scraping mods: {e}")
+            raise
+
+        return {
+            "prefix": prefix,
+            "suffix": suffix
         }
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-
-            try:
-                # Scrape prefix mods
-                logger.info("Scraping prefix mods from poedb.tw...")
-                prefix_url = f"{self.base_url}/mod.php?type=prefix"
-                await page.goto(prefix_url, wait_until="networkidle", timeout=self.timeout)
-                await page.wait_for_selector("table", timeout=10000)
-
-                # Get page HTML
-                html = await page.content()
-                soup = BeautifulSoup(html, 'html.parser')
+    async def _scrape_mod_type(self, mod_type: str, force_refresh: bool = False) -> List[Dict]:
+        """Fetch and parse one mod page ("prefix" or "suffix")"""
+        logger.info(f"Scraping {mod_type} mods from poedb.tw...")
+        url = f"{self.base_url}/mod.php?type={mod_type}"
+        html = await self._fetch_page(url, force_refresh)
 
-                # Parse mod table
-                all_mods["prefix"] = self.parse_mod_table(soup, "prefix")
-                logger.info(f"Found {len(all_mods['prefix'])} prefix mods")
-
-                # Scrape suffix mods
-                logger.info("Scraping suffix mods from poedb.tw...")
-                suffix_url = f"{self.base_url}/mod.php?type=suffix"
-                await page.goto(suffix_url, wait_until="networkidle", timeout=self.timeout)
-                await page.wait_for_selector("table", timeout=10000)
-
-                html = await page.content()
-                soup = BeautifulSoup(html, 'html.parser')
+        # Parsing a full mod table takes a while; keep it off the event loop
+        mods = await asyncio.to_thread(self.parse_mod_table, html, mod_type)
+        logger.info(f"Found {len(mods)} {mod_type} mods")
+        return mods
 
-                all_mods["suffix"] = self.parse_mod_table(soup, "suffix")
-                logger.info(f"Found {len(all_mods['suffix'])} suffix mods")
+    async def _fetch_page(self, url: str, force_refresh: bool = False) -> str:
+        """Rendered page HTML, served from the HTTP cache while younger than MODS_MAX_AGE"""
+        return await fetch_cached(url, MODS_MAX_AGE, lambda: self._render_page(url), force_refresh)
 
-            except Exception as e:
-                logger.error(f"Error scraping mods: {e}")
-                raise
-            finally:
-                await browser.close()
+    async def _render_page(self, url: str) -> str:
+        """Render a poedb page in the headless browser and return its HTML (one pooled context per page)"""
+        async with context_pool.acquire() as context:
+            page = await context.new_page()
+            # DOMContentLoaded + the table selector is the real readiness signal;
+            # networkidle waits out poedb's analytics traffic for nothing
+            await page.goto(url, wait_until="domcontentloaded", timeout=self.timeout)
+            await page.wait_for_selector("table", timeout=10000)
 
-        return all_mods
+            # Get page HTML
+            return await page.content()
 
-    def parse_mod_table(self, soup: BeautifulSoup, mod_type: str) -> List[Dict]:
+    def parse_mod_table(self, html: str, mod_type: str) -> List[Dict]:
         """
         Parse mod table from poedb HTML
         Extracts: name, tier, ilvl, tags, spawn weights
 
         Args:
-            soup: BeautifulSoup object of page HTML
+            html: Page HTML
             mod_type: "prefix" or "suffix"
 
         Returns:
             List of mod dictionaries
         """
         mods = []
-        tables = soup.find_all('table', {'class': 'table'})
+        tree = lxml_html.fromstring(html)
 
-        for table in tables:
-            rows = table.find_all('tr')
+        # Data rows of every table.table (header rows have no <td>)
+        for row in _MOD_ROWS_XPATH(tree):
+            cols = [td.text_content().strip() for td in _CELLS_XPATH(row)]
+            if len(cols) < 3:  # Need at least name, tier, ilvl
+                continue
 
-            # Find header row to determine column indices
-            header_cols = []
-            for row in rows:
-                if row.find('th'):
-                    header_cols = [th.text.strip().lower() for th in row.find_all('th')]
-                    break
+            try:
+                # Extract mod data (column positions may vary)
+                # Common format: [Name, Tier, iLvl, Tags, ...]
+                mod_name = cols[0]
 
-            # Parse data rows
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) < 3:  # Need at least name, tier, ilvl
+                # Skip empty or header rows
+                if not mod_name or mod_name.lower() in ['name', 'mod']:
                     continue
 
-                try:
-                    # Extract mod data (column positions may vary)
-                    # Common format: [Name, Tier, iLvl, Tags, ...]
-                    mod_name = cols[0].text.strip()
-
-                    # Skip empty or header rows
-                    if not mod_name or mod_name.lower() in ['name', 'mod']:
-                        continue
-
-                    tier = cols[1].text.strip() if len(cols) > 1 else "T1"
-                    ilvl_text = cols[2].text.strip() if len(cols) > 2 else "1"
-                    tags = cols[3].text.strip() if len(cols) > 3 else ""
-
-                    # Parse ilvl (might be "68" or "68-84" or "68+")
-                    ilvl = self._parse_ilvl(ilvl_text)
-
-                    # Determine applicable item classes from tags
-                    item_classes = self.parse_tags(tags)
-
-                    # Extract stat values from mod name
-                    stat_ranges = self._extract_stat_ranges(mod_name)
-
-                    mod = {
-                        "name": mod_name,
-                        "type": mod_type,
-                        "tier": tier,
-                        "ilvl": ilvl,
-                        "tags": tags.split(',') if tags else [],
-                        "item_classes": item_classes,
-                        "stat_ranges": stat_ranges,
-                        "source": "poedb"
-                    }
+                tier = cols[1]
+                ilvl_text = cols[2]
+                tags = cols[3] if len(cols) > 3 else ""
 
-                    mods.append(mod)
+                # Parse ilvl (might be "68" or "68-84" or "68+")
+                ilvl = self._parse_ilvl(ilvl_text)
 
-                except Exception as e:
-                    logger.debug(f"Error parsing row: {e}")
-                    continue
+                # Determine applicable item classes from tags
+                item_classes = self.parse_tags(tags)
+
+                # Extract stat values from mod name
+                stat_ranges = self._extract_stat_ranges(mod_name)
+
+                mod = {
+                    "name": mod_name,
+                    "type": mod_type,
+                    "tier": tier,
+                    "ilvl": ilvl,
+                    "tags": tags.split(',') if tags else [],
+                    "item_classes": item_classes,
+                    "stat_ranges": stat_ranges,
+                    "source": "poedb"
+                }
+
+                mods.append(mod)
+
+            except Exception as e:
+                logger.debug(f"Error parsing row: {e}")
+                continue
 
         return mods
 
     def _parse_ilvl(self, ilvl_text: str) -> int:
         """Parse item level from text like '68', '68-84', '68+'"""
-        try:
-            # Extract first number
-            match = re.search(r'(\d+)', ilvl_text)
-            if match:
-                return int(match.group(1))
-        except:
-            pass
-        return 1
+        # Extract first number
+        match = _ILVL_RE.search(ilvl_text)
+        return int(match.group(1)) if match else 1
 
     def _extract_stat_ranges(self, mod_name: str) -> List[Dict[str, Any]]:
         """
@@ -170,19 +198,8 @@ class PoeDBScraper:
             "+(20-30) to maximum Life" -> [{min: 20, max: 30}]
             "+(20-30)% to Fire Resistance, +(10-15)% to Lightning Resistance" -> two ranges
         """
-        ranges = []
-
         # Find all (min-max) patterns
-        pattern = r'\((\d+)-(\d+)\)'
-        matches = re.findall(pattern, mod_name)
-
-        for match in matches:
-            ranges.append({
-                "min": int(match[0]),
-                "max": int(match[1])
-            })
-
-        return ranges
+        return [{"min": int(lo), "max": int(hi)} for lo, hi in _RANGE_RE.findall(mod_name)]
 
     def parse_tags(self, tags: str) -> List[str]:
         """
@@ -194,110 +211,86 @@ class PoeDBScraper:
         Returns:
             List of applicable item classes
         """
-        item_classes = []
-        tag_lower = tags.lower()
-
-        # Map tags to item classes
-        tag_mappings = {
-            'ring': ['Ring'],
-            'jewellery': ['Ring', 'Amulet'],
-            'amulet': ['Amulet'],
-            'belt': ['Belt'],
-            'body': ['Body Armour'],
-            'armour': ['Body Armour', 'Helmet', 'Gloves', 'Boots'],
-            'helmet': ['Helmet'],
-            'helm': ['Helmet'],
-            'gloves': ['Gloves'],
-            'boots': ['Boots'],
-            'shield': ['Shield'],
-            'weapon': ['Sword', 'Axe', 'Mace', 'Bow', 'Wand', 'Dagger', 'Claw', 'Staff', 'Sceptre'],
-            'sword': ['Sword'],
-            'axe': ['Axe'],
-            'mace': ['Mace'],
-            'bow': ['Bow'],
-            'wand': ['Wand'],
-            'dagger': ['Dagger'],
-            'claw': ['Claw'],
-            'staff': ['Staff'],
-            'sceptre': ['Sceptre'],
-            'quiver': ['Quiver'],
-            'jewel': ['Jewel'],
-            'flask': ['Flask']
-        }
-
-        # Check each tag mapping
-        for tag, classes in tag_mappings.items():
-            if tag in tag_lower:
-                item_classes.extend(classes)
+        item_classes = set()
 
-        # Remove duplicates
-        item_classes = list(set(item_classes))
+        # Look up each word of each tag (exact match, no substring scan); compound
+        # tags like "body_armour" or "two_hand_weapon" map through their parts
+        for token in _TAG_SPLIT_RE.split(tags.lower()):
+            classes = _TAG_TO_CLASSES.get(token)
+            if classes:
+                item_classes.update(classes)
 
         # Default to universal if no specific class found
-        if not item_classes:
-            item_classes.append("universal")
+        return list(item_classes) or ["universal"]
 
-        return item_classes
-
-    async def scrape_item_bases(self) -> List[Dict]:
+    async def scrape_item_bases(self, force_refresh: bool = False) -> List[Dict]:
         """
         Scrape all item bases (for accurate ilvl requirements, implicit mods, etc.)
 
+        Args:
+            force_refresh: Re-render the page even if a cached copy is fresh
+
         Returns:
             List of base item dictionaries
         """
-        bases = []
+        try:
+            # Scrape from poedb item database
+            url = f"{self.base_url}/item.php"
+            logger.info(f"Scraping item bases from: {url}")
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
+            html = await self._fetch_page(url, force_refresh)
+            bases = await asyncio.to_thread(self.parse_item_bases, html)
 
-            try:
-                # Scrape from poedb item database
-                url = f"{self.base_url}/item.php"
-                logger.info(f"Scraping item bases from: {url}")
+        except Exception as e:
+            logger.error(f"Error scraping bases: {e}")
+            raise
 
-                await page.goto(url, wait_until="networkidle", timeout=self.timeout)
-                await page.wait_for_selector("table", timeout=10000)
+        logger.info(f"Scraped {len(bases)} item bases")
+        return bases
 
-                html = await page.content()
-                soup = BeautifulSoup(html, 'html.parser')
+    def parse_item_bases(self, html: str) -> List[Dict]:
+        """
+        Parse base item tables from poedb HTML
 
-                # Parse base items...
-                # (Similar parsing logic as mods)
-                tables = soup.find_all('table', {'class': 'table'})
+        Args:
+            html: Page HTML of poedb's item database
+
+        Returns:
+            List of base item dictionaries
+        """
+        bases = []
+        soup = BeautifulSoup(html, 'lxml')
 
-                for table in tables:
-                    rows = table.find_all('tr')[1:]  # Skip header
+        # Parse base items...
+        # (Similar parsing logic as mods)
+        tables = soup.find_all('table', {'class': 'table'})
 
-                    for row in rows:
-                        cols = row.find_all('td')
-                        if len(cols) < 2:
-                            continue
+        for table in tables:
+            # Single pass: header rows (<th>) are skipped in-line rather than by slicing off row 0
+            for row in table.find_all('tr'):
+                if row.th is not None:
+                    continue
 
-                        try:
-                            base_name = cols[0].text.strip()
-                            base_type = cols[1].text.strip() if len(cols) > 1 else ""
+                cols = row.find_all('td')
+                if len(cols) < 2:
+                    continue
 
-                            base = {
-                                "name": base_name,
-                                "type": base_type,
-                                "source": "poedb"
-                            }
+                try:
+                    base_name = cols[0].get_text(' ', strip=True)
+                    base_type = cols[1].get_text(' ', strip=True)
 
-                            bases.append(base)
+                    base = {
+                        "name": base_name,
+                        "type": base_type,
+                        "source": "poedb"
+                    }
 
-                        except Exception as e:
-                            logger.debug(f"Error parsing base: {e}")
-                            continue
+                    bases.append(base)
 
-            except Exception as e:
-                logger.error(f"Error scraping bases: {e}")
-                raise
-            finally:
-                await browser.close()
+                except Exception as e:
+                    logger.debug(f"Error parsing base: {e}")
+                    continue
 
-        logger.info(f"Scraped {len(bases)} item bases")
         return bases
 
 
@@ -322,6 +315,8 @@ async def main():
         print("\nExample suffix mod:")
         print(mods['suffix'][0])
 
+    await close_browser()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,80 @@
+"""
+Disk + memory TTL cache for scraped pages and API responses
+poedb mod tables and poe.ninja /api/data change over hours, so a recent copy
+is served instead of re-rendering the page (a hit never launches Chromium)
+
+Entries are keyed by URL and stored as {"data", "fetched_at"}; callers pass
+their own max_age_s, so one entry can be fresh for one caller and stale for another.
+"""
+from cachetools import LRUCache
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import diskcache
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get("POE_HTTP_CACHE_DIR", "../data/http_cache")
+
+# Default max ages
+MODS_MAX_AGE = 6 * 60 * 60   # poedb mod tables / item bases
+CURRENCY_MAX_AGE = 5 * 60    # poe.ninja market data
+
+_memory: LRUCache = LRUCache(maxsize=64)
+_disk: Optional[diskcache.Cache] = None
+
+
+def _get_disk() -> diskcache.Cache:
+    global _disk
+    if _disk is None:
+        _disk = diskcache.Cache(CACHE_DIR)
+    return _disk
+
+
+async def fetch_cached(
+    url: str,
+    max_age_s: float,
+    fetch: Callable[[], Awaitable[Any]],
+    force_refresh: bool = False
+) -> Any:
+    """
+    Return the cached value for url if younger than max_age_s, else await fetch() and store it
+
+    Args:
+        url: Cache key
+        max_age_s: Maximum age in seconds of a cached entry
+        fetch: Coroutine function producing the fresh value (HTML string or parsed JSON)
+        force_refresh: Skip the lookup and always fetch
+
+    Returns:
+        Cached or freshly fetched value
+    """
+    if not force_refresh:
+        entry = _memory.get(url)
+        if entry is None:
+            # diskcache is SQLite under the hood, keep it off the event loop
+            entry = await asyncio.to_thread(_get_disk().get, url)
+            if entry is not None:
+                _memory[url] = entry
+
+        if entry is not None and time.time() - entry["fetched_at"] < max_age_s:
+            logger.info(f"Cache hit: {url}")
+            return entry["data"]
+
+    data = await fetch()
+    entry = {"data": data, "fetched_at": time.time()}
+    _memory[url] = entry
+    # No diskcache expiry: freshness is judged per caller from fetched_at, and
+    # diskcache's size limit (default 1 GB, least-recently-stored culling) bounds the disk
+    await asyncio.to_thread(_get_disk().set, url, entry)
+    return data
+
+
+def close_cache():
+    """Close the disk cache (called on shutdown)"""
+    global _disk
+    if _disk is not None:
+        _disk.close()
+        _disk = None
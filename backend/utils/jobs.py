@@ -0,0 +1,85 @@
+"""
+Background Job Registry
+Runs long scrapes (Playwright, minutes) outside the HTTP request
+
+Endpoints start a job and return its id immediately; clients poll
+GET /api/jobs/{job_id} for state and result
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from datetime import datetime
+import asyncio
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class JobRegistry:
+    def __init__(self, max_finished: int = 50):
+        """
+        Args:
+            max_finished: Number of finished jobs kept for polling before the oldest are dropped
+        """
+        self.max_finished = max_finished
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Set[asyncio.Task] = set()  # Strong refs so running tasks aren't GC'd
+
+    def start(self, job_type: str, work: Callable[[], Awaitable[Any]]) -> Dict[str, Any]:
+        """
+        Schedule `work` on the event loop and register it
+
+        Args:
+            job_type: Label reported back to clients (e.g. "scrape_mods")
+            work: Zero-argument coroutine function; its return value becomes the job result
+
+        Returns:
+            The job record (state "running")
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "type": job_type,
+            "state": "running",
+            "started_at": datetime.utcnow().isoformat(),
+            "finished_at": None,
+            "result": None,
+            "error": None
+        }
+        self._jobs[job_id] = job
+
+        task = asyncio.create_task(self._run(job, work))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        logger.info(f"Started {job_type} job {job_id}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job record by id"""
+        return self._jobs.get(job_id)
+
+    async def shutdown(self):
+        """Cancel jobs still running (called from the app lifespan)"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self, job: Dict[str, Any], work: Callable[[], Awaitable[Any]]):
+        try:
+            job["result"] = await work()
+            job["state"] = "completed"
+        except asyncio.CancelledError:
+            job["state"] = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"{job['type']} job {job['job_id']} failed: {e}")
+            job["state"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = datetime.utcnow().isoformat()
+            self._prune()
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j["state"] != "running"]
+        for job in finished[:-self.max_finished]:
+            del self._jobs[job["job_id"]]